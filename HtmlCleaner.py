@@ -15,7 +15,9 @@ Installation:
 
 import sublime
 import sublime_plugin
+import io
 import re
+from html import escape
 from html.parser import HTMLParser
 
 # =============================================================================
@@ -71,105 +73,219 @@ CONFIG = {
     "convert_tables_to_paragraphs": True,  # Convert table rows to <p> tags
 }
 
+# =============================================================================
+# PRECOMPILED PATTERNS
+# =============================================================================
+
+# Table cell / div markers emitted by the parser
+_CELL_START = "<!--CELL_START-->"
+_CELL_END = "<!--CELL_END-->"
+_DIV_START = "<!--DIV_START-->"
+_DIV_END = "<!--DIV_END-->"
+_RE_CELL = re.compile(re.escape(_CELL_START) + r'(.*?)' + re.escape(_CELL_END), re.DOTALL)
+_RE_CELL_MARKER = re.compile(re.escape(_CELL_START) + '|' + re.escape(_CELL_END))
+_RE_DIV = re.compile(re.escape(_DIV_START) + r'(.*?)' + re.escape(_DIV_END), re.DOTALL)
+_RE_DIV_MARKER = re.compile(re.escape(_DIV_START) + '|' + re.escape(_DIV_END))
+_RE_P_STARTS = re.compile(r'^<p(\s|>)', re.IGNORECASE)
+
+# &nbsp; collapsing
+_RE_NBSP_MULTI = re.compile(r'(&nbsp;\s*){2,}')
+_RE_NBSP_RUN = re.compile(r'(\s*&nbsp;\s*)+')
+_RE_NBSP_EDGES = re.compile(r'^(?:\s*&nbsp;\s*)+|(?:\s*&nbsp;\s*)+$')
+
+# Whitespace normalization
+_RE_MULTI_NEWLINE = re.compile(r'\n\s*\n\s*\n+')
+_RE_BLANK_LINES = re.compile(r'\n{3,}')
+_RE_SPACES = re.compile(r' +')
+_RE_BLOCK_CLOSE = re.compile(r'(</(?:p|div|h[1-6]|tr|li|ul|ol|table|blockquote)>)')
+
+# Spaces between block-level tags (inline tags like <b>, <a> keep theirs)
+_BLOCK_TAGS = r'(?:p|div|h[1-6]|tr|li|ul|ol|table|blockquote|br|hr|img)'
+_RE_BLOCK_CLOSE_HSPACE = re.compile(r'(</' + _BLOCK_TAGS + r'>)[ \t]+(<)')
+_RE_HSPACE_BLOCK = re.compile(r'(>)[ \t]+(</?' + _BLOCK_TAGS + r')')
+_RE_BLOCK_CLOSE_SPACE = re.compile(r'(</' + _BLOCK_TAGS + r'>)\s+(<)')
+_RE_SPACE_BLOCK = re.compile(r'(>)\s+(</?' + _BLOCK_TAGS + r')')
+
+# Paragraph cleanup
+_RE_P_OPEN_SPACE = re.compile(r'<p>\s+')
+_RE_P_CLOSE_SPACE = re.compile(r'\s+</p>')
+_RE_P_LEADING_BR = re.compile(r'<p><br\s*/?>')
+_RE_P_NESTED = re.compile(r'(</?p>)(?:\s*\1)+')
+_RE_P_EMPTY = re.compile(r'<p>\s*</p>\n*')
+_RE_P_BLANK = re.compile(r'<p>(\s|&nbsp;|&#8202;)*</p>\n*')
+_RE_P_DANGLING_OPEN = re.compile(r'^<p>\s*\n')
+_RE_P_DANGLING_CLOSE = re.compile(r'\n\s*</p>\s*\n')
+_RE_P_LEADING_CLOSE = re.compile(r'^\s*</p>\s*\n')
+_RE_P_ADJACENT = re.compile(r'(</p>)\n(<p>)')
+
+# Paragraphs containing only an image (with or without bold/link wrappers).
+# Group 1 is the bold-wrapped image (wrapper dropped), group 2 the bare one.
+_IMG = r'(?:\[link\]<img [^>]+/>\[/link\]|<img [^>]+/>)'
+_RE_IMG_ONLY_P = re.compile(r'<p>(?:\s*<b>\s*(' + _IMG + r')\s*</b>\s*|(\s*' + _IMG + r'\s*))</p>')
+
+# Inline style checks (matched case-insensitively, no lowercased copy needed)
+_RE_HIDDEN_STYLE = re.compile(
+    r'display\s*:\s*none|visibility\s*:\s*hidden|mso-hide\s*:\s*all'
+    r'|max-height\s*:\s*0|opacity\s*:\s*0',
+    re.IGNORECASE,
+)
+_RE_BOLD_STYLE = re.compile(r'font-weight\s*:\s*bold', re.IGNORECASE)
+_RE_WIDTH_1PX = re.compile(r'width:\s*1px', re.IGNORECASE)
+_RE_HEIGHT_1PX = re.compile(r'height:\s*1px', re.IGNORECASE)
+
+# Characters that cannot be told apart in the editor once decoded: format
+# characters (Unicode category Cf: soft hyphen, zero-width spaces/joiners,
+# direction marks, ...), the combining grapheme joiner, and non-ASCII spaces
+# other than U+00A0 (category Zs: en/em/thin/hair/ideographic spaces, ...).
+# They are written back out as character references. Listed by hand rather
+# than looked up with unicodedata, which would mean a scan over every code
+# point at plugin load.
+_RE_INVISIBLE = re.compile(
+    r'[\xad\u034f\u0600-\u0605\u061c\u06dd\u070f\u0890-\u0891\u08e2\u180e'
+    r'\u200b-\u200f\u202a-\u202e\u2060-\u2064\u2066-\u206f\ufeff\ufff9-\ufffb'
+    r'\U000110bd\U000110cd\U00013430-\U0001343f\U0001bca0-\U0001bca3'
+    r'\U0001d173-\U0001d17a\U000e0001\U000e0020-\U000e007f'
+    r'\u1680\u2000-\u200a\u202f\u205f\u3000]'
+)
+
+# Anchors whose href contains one of these stay inline instead of becoming [link]
+_RE_INLINE_HREF = re.compile(r'mailto|disclosure|privacy', re.IGNORECASE)
+
 # =============================================================================
 # HTML PARSER AND CLEANER
 # =============================================================================
 
+# Tag groups the parser treats specially, independent of config
+_TABLE_SKIP_TAGS = frozenset(("table", "thead", "tbody", "tfoot", "tr"))
+_TABLE_CELL_TAGS = frozenset(("td", "th"))
+_SELF_CLOSING_TAGS = frozenset(("img", "br", "hr"))
+# Elements whose content browsers read as plain text up to the end tag
+# (script and style are already handled that way by HTMLParser)
+_RAW_TEXT_TAGS = frozenset(("iframe", "noembed", "noframes", "noscript", "textarea", "xmp"))
+
+
+def _escape_text(data):
+    """Re-escape text HTMLParser has decoded so the output stays valid HTML.
+
+    Non-breaking spaces become &nbsp; again, and other special spaces and
+    invisible characters become numeric references, so none of them is
+    lost to whitespace collapsing or disappears from view in the output.
+    """
+    data = escape(data, quote=False).replace("\xa0", "&nbsp;")
+    if _RE_INVISIBLE.search(data):
+        data = _RE_INVISIBLE.sub(lambda m: f"&#{ord(m.group())};", data)
+    return data
+
+
+def _quote_attr(value):
+    """Re-escape an attribute value HTMLParser has unescaped (apostrophes
+    need no escaping inside the double quotes it is written in)."""
+    return escape(value, quote=False).replace('"', "&quot;")
+
+
 class HtmlCleanerParser(HTMLParser):
     def __init__(self, config):
-        super().__init__(convert_charrefs=False)
+        super().__init__(convert_charrefs=True)
         self.config = config
-        self.output = []
+        # Precomputed sets for O(1) tag/attribute membership tests
+        self._remove_set = frozenset(config["remove_with_content"])
+        self._keep_set = frozenset(config["keep_tags"])
+        # Attributes each tag keeps, with the removal flags already applied
+        keep_attributes = config["keep_attributes"]
+        self._kept_global = self._without_removed(keep_attributes.get("*", ()))
+        self._kept_attrs = {
+            t: self._without_removed(v) | self._kept_global
+            for t, v in keep_attributes.items()
+        }
+        self._remove_empty = config["remove_empty_tags"]
+        self._nbsp_is_blank = config["remove_successive_nbsp"]
+        self.output = io.StringIO()
+        self._empty_candidates = []  # (name, output index) of opens with nothing after them yet
         self.skip_depth = 0  # Track depth when inside removed tags
         self.pretext_depth = 0  # Track depth when inside hidden pretext
         self.pretext_content = []  # Collect pretext content temporarily
         self.pretexts = []  # Store all found pretexts
         self.bold_tag_stack = []  # Track tags that have font-weight: bold
-        self.links = []  # Store unique URLs in order found
-        self.link_set = set()  # Track seen URLs for deduplication
+        self.links = {}  # Unique URLs in order found (dict as an ordered set)
         self.title = None  # Store document title
         self.in_title = False  # Track if we're inside a title tag
         self.title_content = []  # Collect title content
         self.inline_anchor_depth = 0  # Track inline anchors (mailto, disclosure, privacy)
+        self._select_data_handler()
 
-    def _is_hidden_pretext(self, attrs):
-        """Check if element has CSS indicating hidden pretext."""
-        for name, value in attrs:
-            if name == "style" and value:
-                style_lower = value.lower()
-                # Check for common hidden element patterns
-                if any(pattern in style_lower for pattern in [
-                    "display: none", "display:none",
-                    "visibility: hidden", "visibility:hidden",
-                    "mso-hide: all", "mso-hide:all",
-                    "max-height: 0", "max-height:0",
-                    "opacity: 0", "opacity:0",
-                ]):
-                    return True
-        return False
-
-    def _has_bold_style(self, attrs):
-        """Check if element has font-weight: bold in style."""
-        for name, value in attrs:
-            if name == "style" and value:
-                style_lower = value.lower()
-                if "font-weight: bold" in style_lower or "font-weight:bold" in style_lower:
-                    return True
-        return False
+    def _is_hidden_pretext(self, style):
+        """Check if style has CSS indicating hidden pretext."""
+        return _RE_HIDDEN_STYLE.search(style) is not None
+
+    def _has_bold_style(self, style):
+        """Check if style has font-weight: bold."""
+        return _RE_BOLD_STYLE.search(style) is not None
 
-    def _is_tracking_pixel(self, attrs):
+    def _is_tracking_pixel(self, attrs, style):
         """Check if img is a 1x1 tracking pixel."""
         width_1 = False
         height_1 = False
         for name, value in attrs:
-            if name == "width" and value in ["1", "1px"]:
+            if name == "width" and value in ("1", "1px"):
+                width_1 = True
+            elif name == "height" and value in ("1", "1px"):
+                height_1 = True
+        if style:
+            if _RE_WIDTH_1PX.search(style):
                 width_1 = True
-            elif name == "height" and value in ["1", "1px"]:
+            if _RE_HEIGHT_1PX.search(style):
                 height_1 = True
-            elif name == "style" and value:
-                style_lower = value.lower()
-                if re.search(r'width:\s*1px', style_lower):
-                    width_1 = True
-                if re.search(r'height:\s*1px', style_lower):
-                    height_1 = True
         return width_1 and height_1
 
     def handle_starttag(self, tag, attrs):
         # Handle title tag specially (extract before any skip logic)
         if tag == "title" and self.title is None:
             self.in_title = True
+            self._select_data_handler()
             return
 
         # Check if we're inside a tag being removed entirely
-        if self.skip_depth > 0:
-            if tag in self.config["remove_with_content"]:
-                self.skip_depth += 1
+        skip_depth = self.skip_depth
+        removed = tag in self._remove_set
+        if skip_depth:
+            if removed:
+                self.skip_depth = skip_depth + 1
+                self._skip_raw_text(tag)
             return
 
         # Start skipping if this tag should be removed with content
-        if tag in self.config["remove_with_content"]:
+        if removed:
             self.skip_depth = 1
+            self._select_data_handler()
+            self._skip_raw_text(tag)
             return
 
         # Check for hidden pretext
         if self.pretext_depth > 0:
             self.pretext_depth += 1
             return
-        if self._is_hidden_pretext(attrs):
+        # Style for the checks below (a browser ignores any repeated style)
+        style = None
+        for name, value in attrs:
+            if name == "style":
+                style = value
+                break
+        if style and self._is_hidden_pretext(style):
             self.pretext_depth = 1
+            self._select_data_handler()
             return
 
         # Handle table conversion
         if self.config["convert_tables_to_paragraphs"]:
-            if tag in ["table", "thead", "tbody", "tfoot", "tr"]:
+            if tag in _TABLE_SKIP_TAGS:
                 return  # Skip these, just let content through
-            if tag in ["td", "th"]:
-                self.output.append("<!--CELL_START-->")
+            if tag in _TABLE_CELL_TAGS:
+                self._open("cell", _CELL_START)
                 return
 
         # Convert div to paragraph
         if tag == "div":
-            self.output.append("<!--DIV_START-->")
+            self._text(_DIV_START)
             return
 
         # Handle span removal
@@ -177,7 +293,7 @@ class HtmlCleanerParser(HTMLParser):
             return  # Don't output span, content will still come through
 
         # Remove 1x1 tracking pixel images
-        if tag == "img" and self._is_tracking_pixel(attrs):
+        if tag == "img" and self._is_tracking_pixel(attrs, style):
             return
 
         # Convert b/i to strong/em
@@ -188,7 +304,7 @@ class HtmlCleanerParser(HTMLParser):
                 tag = "em"
 
         # Check if tag should be kept
-        if tag not in self.config["keep_tags"]:
+        if tag not in self._keep_set:
             return  # Unwrap: skip tag but content will still come through
 
         # Handle anchor tags specially - extract URL and use [link] tags
@@ -199,57 +315,60 @@ class HtmlCleanerParser(HTMLParser):
                     href = value
                     break
             # Check if anchor has bold styling
-            is_bold = self._has_bold_style(attrs)
+            is_bold = bool(style) and self._has_bold_style(style)
             # Skip special URLs - leave them inline
-            skip_patterns = ["mailto", "disclosure", "privacy"]
-            if href and any(pattern in href.lower() for pattern in skip_patterns):
+            if href and _RE_INLINE_HREF.search(href):
                 # Output as regular anchor tag with href
                 if is_bold:
-                    self.output.append('<b><a href="{}">'.format(href))
-                else:
-                    self.output.append('<a href="{}">'.format(href))
+                    self._open("b", "<b>")
+                self._open("a", f'<a href="{_quote_attr(href)}">')
                 self.inline_anchor_depth += 1
                 if is_bold:
                     self.bold_tag_stack.append("a")
                 return
             if href:
-                # Add to unique links list
-                if href not in self.link_set:
-                    self.link_set.add(href)
-                    self.links.append(href)
+                # Add to unique links (first occurrence keeps its place)
+                self.links.setdefault(href, None)
             # Output [link] with bold wrapper if needed
             if is_bold:
-                self.output.append("<b>[link]")
+                self._text("<b>[link]")
                 self.bold_tag_stack.append("a")
             else:
-                self.output.append("[link]")
+                self._text("[link]")
             return
 
         # Filter attributes
         filtered_attrs = self._filter_attributes(tag, attrs)
 
-        # Check if this tag has bold styling
-        is_bold = self._has_bold_style(attrs)
+        # Check if this tag has bold styling (self-closing tags have nothing
+        # to wrap, and no end tag would ever pop them off the stack)
+        self_closing = tag in _SELF_CLOSING_TAGS
+        is_bold = not self_closing and bool(style) and self._has_bold_style(style)
         if is_bold:
             self.bold_tag_stack.append(tag)
 
         # Build tag string
-        self_closing = tag in ["img", "br", "hr"]
         if filtered_attrs:
-            attr_str = " ".join('{}="{}"'.format(k, v) for k, v in filtered_attrs)
+            attr_str = " ".join([f'{k}="{_quote_attr(v)}"' for k, v in filtered_attrs])
             if self_closing:
-                self.output.append("<{} {} />".format(tag, attr_str))
+                self._text(f"<{tag} {attr_str} />")
             else:
-                self.output.append("<{} {}>".format(tag, attr_str))
+                self._open(tag, f"<{tag} {attr_str}>")
         else:
             if self_closing:
-                self.output.append("<{} />".format(tag))
+                self._text(f"<{tag} />")
             else:
-                self.output.append("<{}>".format(tag))
+                self._open(tag, f"<{tag}>")
 
         # Add <b> after opening tag if bold styled
-        if is_bold and not self_closing:
-            self.output.append("<b>")
+        if is_bold:
+            self._open("b", "<b>")
+
+    def _skip_raw_text(self, tag):
+        """Have HTMLParser pass a removed raw-text element's content as one
+        chunk of text instead of tokenizing the markup inside it."""
+        if tag in _RAW_TEXT_TAGS:
+            self.set_cdata_mode(tag)
 
     def handle_startendtag(self, tag, attrs):
         # Handle self-closing tags like <img ... /> or <br />
@@ -261,12 +380,16 @@ class HtmlCleanerParser(HTMLParser):
             self.in_title = False
             self.title = "".join(self.title_content).strip()
             self.title_content = []
+            self._select_data_handler()
             return
 
         # Handle skip depth for removed tags
-        if self.skip_depth > 0:
-            if tag in self.config["remove_with_content"]:
-                self.skip_depth -= 1
+        skip_depth = self.skip_depth
+        if skip_depth:
+            if tag in self._remove_set:
+                self.skip_depth = skip_depth - 1
+                if skip_depth == 1:
+                    self._select_data_handler()
             return
 
         # Handle pretext depth
@@ -276,25 +399,24 @@ class HtmlCleanerParser(HTMLParser):
                 # Store collected pretext for output at top
                 pretext = "".join(self.pretext_content).strip()
                 # Strip &nbsp; from beginning and end
-                pretext = re.sub(r'^(\s*&nbsp;\s*)+', '', pretext)
-                pretext = re.sub(r'(\s*&nbsp;\s*)+$', '', pretext)
-                pretext = pretext.strip()
+                pretext = _RE_NBSP_EDGES.sub('', pretext).strip()
                 if pretext:
                     self.pretexts.append(pretext)
                 self.pretext_content = []
+                self._select_data_handler()
             return
 
         # Handle table conversion
         if self.config["convert_tables_to_paragraphs"]:
-            if tag in ["table", "thead", "tbody", "tfoot", "tr"]:
+            if tag in _TABLE_SKIP_TAGS:
                 return
-            if tag in ["td", "th"]:
-                self.output.append("<!--CELL_END-->")
+            if tag in _TABLE_CELL_TAGS:
+                self._close_cell()
                 return
 
         # Convert div to paragraph
         if tag == "div":
-            self.output.append("<!--DIV_END-->")
+            self._text(_DIV_END)
             return
 
         # Handle span removal
@@ -309,99 +431,169 @@ class HtmlCleanerParser(HTMLParser):
                 tag = "em"
 
         # Only output end tag if we're keeping this tag
-        if tag in self.config["keep_tags"]:
+        if tag in self._keep_set:
             # Handle anchor tags specially
             if tag == "a":
                 # Check if this anchor was bold styled
                 is_bold_anchor = self.bold_tag_stack and self.bold_tag_stack[-1] == "a"
                 if self.inline_anchor_depth > 0:
                     # This is an inline anchor (mailto, disclosure, privacy)
+                    self._close("a", "</a>")
                     if is_bold_anchor:
-                        self.output.append("</a></b>")
+                        self._close("b", "</b>")
                         self.bold_tag_stack.pop()
-                    else:
-                        self.output.append("</a>")
                     self.inline_anchor_depth -= 1
                 else:
                     if is_bold_anchor:
-                        self.output.append("[/link]</b>")
+                        self._text("[/link]</b>")
                         self.bold_tag_stack.pop()
                     else:
-                        self.output.append("[/link]")
+                        self._text("[/link]")
                 return
             # Close </b> before closing tag if it was bold styled
             if self.bold_tag_stack and self.bold_tag_stack[-1] == tag:
-                self.output.append("</b>")
+                self._close("b", "</b>")
                 self.bold_tag_stack.pop()
-            self.output.append("</{}>".format(tag))
+            self._close(tag, f"</{tag}>")
 
     def handle_data(self, data):
+        # Only used inside title, removed or pretext regions; other text goes
+        # to _handle_content_data (see _select_data_handler)
         if self.in_title:
             self.title_content.append(data)
-            return
-        if self.skip_depth > 0:
-            return
-        if self.pretext_depth > 0:
-            self.pretext_content.append(data)
-            return
-        self.output.append(data)
-
-    def handle_entityref(self, name):
-        if self.skip_depth > 0:
-            return
-        if self.pretext_depth > 0:
-            self.pretext_content.append("&{};".format(name))
-            return
-        self.output.append("&{};".format(name))
-
-    def handle_charref(self, name):
-        if self.skip_depth > 0:
-            return
-        if self.pretext_depth > 0:
-            self.pretext_content.append("&#{};".format(name))
-            return
-        self.output.append("&#{};".format(name))
+        elif self.pretext_depth > 0 and not self.skip_depth:
+            self.pretext_content.append(_escape_text(data))
+
+    def _handle_content_data(self, data):
+        """handle_data for text that goes straight to the output."""
+        data = _escape_text(data)
+        if self._empty_candidates and not self._is_blank(data):
+            self._empty_candidates.clear()
+        self.output.write(data)
+
+    def _select_data_handler(self):
+        """Bind handle_data to the fast path unless text is being diverted.
+
+        Called whenever title, skip or pretext state changes, so the fast
+        path needs none of handle_data's checks. The bound method stored on
+        the instance refers back to it; _clean_html unbinds it once parsing
+        is done so the parser is freed without waiting for the cyclic
+        garbage collector.
+        """
+        if self.in_title or self.skip_depth or self.pretext_depth:
+            # Fall back to the class's handle_data
+            vars(self).pop("handle_data", None)
+        else:
+            self.handle_data = self._handle_content_data
 
     def handle_comment(self, data):
         if self.skip_depth > 0:
             return
         if not self.config["remove_comments"]:
-            self.output.append("<!--{}-->".format(data))
+            self._text(f"<!--{data}-->")
+
+    def _open(self, name, html):
+        """Output an opening tag, remembering it in case it closes empty."""
+        if self._remove_empty:
+            self._empty_candidates.append((name, self.output.tell()))
+        self.output.write(html)
+
+    def _close(self, name, html):
+        """Output a closing tag, or drop the whole element if it is empty.
+
+        An element is empty when only whitespace was output since its
+        opening tag. Dropping it here (and recursively its parent) replaces
+        the old multi-pass empty-tag regex over the finished output. Cells
+        still open inside the element get their start markers written again,
+        since convert_cells_to_paragraphs pairs each start marker with the
+        next end marker whatever the nesting.
+        """
+        candidates = self._empty_candidates
+        if candidates:
+            i = len(candidates) - 1
+            while i > 0 and candidates[i][0] == "cell":
+                i -= 1
+            if candidates[i][0] == name:
+                open_cells = len(candidates) - 1 - i
+                self._truncate(candidates[i][1])
+                del candidates[i:]
+                for _ in range(open_cells):
+                    self._open("cell", _CELL_START)
+                return
+            candidates.clear()
+        self.output.write(html)
+
+    def _close_cell(self):
+        """Output a cell end marker, emptying the cell if it is blank.
+
+        The markers themselves are kept so convert_cells_to_paragraphs still
+        pairs them up the same way; it drops cells with no content. A blank
+        cell does not make the element around it non-empty.
+        """
+        candidates = self._empty_candidates
+        if candidates:
+            if candidates[-1][0] == "cell":
+                self._truncate(candidates.pop()[1] + len(_CELL_START))
+            else:
+                candidates.clear()
+        self.output.write(_CELL_END)
+
+    def _text(self, html):
+        """Output content that makes any currently open elements non-empty."""
+        self._empty_candidates.clear()
+        self.output.write(html)
+
+    def _truncate(self, pos):
+        """Discard output written after pos."""
+        self.output.seek(pos)
+        self.output.truncate()
+
+    def _is_blank(self, data):
+        """Check if data would be whitespace after &nbsp; collapsing."""
+        if self._nbsp_is_blank:
+            data = data.replace("&nbsp;", "")
+        return not data.strip()
+
+    def _without_removed(self, names):
+        """Drop attribute names the config's remove_* flags strip."""
+        config = self.config
+        drop = set()
+        if config["remove_classes"]:
+            drop.add("class")
+        if config["remove_ids"]:
+            drop.add("id")
+        if config["remove_inline_styles"]:
+            drop.add("style")
+        rm_data = config["remove_data_attributes"]
+        return frozenset(
+            name for name in names
+            if name not in drop and not (rm_data and name.startswith("data-"))
+        )
 
     def _filter_attributes(self, tag, attrs):
         """Filter attributes based on config."""
-        if not attrs:
+        allowed = self._kept_attrs.get(tag, self._kept_global)
+        # Most tags keep no attributes at all
+        if not attrs or not allowed:
             return []
+        return [(name, value or "") for name, value in attrs if name in allowed]
 
-        allowed = self.config["keep_attributes"].get(tag, [])
-        allowed_global = self.config["keep_attributes"].get("*", [])
+    def updatepos(self, i, j):
+        """Skip HTMLParser's line/column bookkeeping.
 
-        filtered = []
-        for name, value in attrs:
-            # Skip based on config flags
-            if name == "class" and self.config["remove_classes"]:
-                continue
-            if name == "id" and self.config["remove_ids"]:
-                continue
-            if name == "style" and self.config["remove_inline_styles"]:
-                continue
-            if name.startswith("data-") and self.config["remove_data_attributes"]:
-                continue
-
-            # Keep if in allowed list for this tag or global
-            if name in allowed or name in allowed_global:
-                filtered.append((name, value or ""))
-
-        return filtered
+        The base class counts newlines in every chunk it consumes so that
+        getpos() can report a position, which nothing here ever asks for.
+        """
+        return j
 
     def get_output(self):
-        return "".join(self.output)
+        return self.output.getvalue()
 
     def get_pretexts(self):
         return self.pretexts
 
     def get_links(self):
-        return self.links
+        return list(self.links)
 
     def get_title(self):
         return self.title
@@ -409,32 +601,60 @@ class HtmlCleanerParser(HTMLParser):
 
 def convert_cells_to_paragraphs(html):
     """Convert table cell markers to paragraph tags, avoiding duplicates."""
-    pattern = r'<!--CELL_START-->(.*?)<!--CELL_END-->'
+    if _CELL_START not in html and _CELL_END not in html:
+        return html
 
     def replace_cell(match):
         content = match.group(1).strip()
         if not content:
             return ''
         # Check if content already has a p tag wrapping it
-        if re.match(r'^<p(\s|>)', content, re.IGNORECASE):
+        if _RE_P_STARTS.match(content):
             return content
-        return '<p>{}</p>'.format(content)
+        return f'<p>{content}</p>'
 
-    result = re.sub(pattern, replace_cell, html, flags=re.DOTALL)
+    result = _RE_CELL.sub(replace_cell, html)
 
     # Clean up any remaining markers (in case of malformed/nested tables)
-    result = re.sub(r'<!--CELL_START-->', '', result)
-    result = re.sub(r'<!--CELL_END-->', '', result)
+    result = _RE_CELL_MARKER.sub('', result)
 
     return result
 
 
+# Recently cleaned inputs, oldest first: (html, repr(config)) -> result
+_clean_cache = {}
+_CLEAN_CACHE_SIZE = 8
+_CLEAN_CACHE_MAX_INPUT = 512 * 1024  # Larger inputs are not worth keeping around
+
+
 def clean_html(html, config):
-    """Main cleaning function."""
+    """Main cleaning function, reusing results for recently seen inputs."""
+    if len(html) > _CLEAN_CACHE_MAX_INPUT:
+        return _clean_html(html, config)
+    # repr(config) makes edits to CONFIG miss the cache
+    key = (html, repr(config))
+    result = _clean_cache.pop(key, None)
+    if result is None:
+        result = _clean_html(html, config)
+        if not isinstance(result, dict):
+            return result  # Parse error, already reported
+        if len(_clean_cache) >= _CLEAN_CACHE_SIZE:
+            del _clean_cache[next(iter(_clean_cache))]
+    _clean_cache[key] = result
+    return dict(result)
+
+
+def _clean_html(html, config):
+    """Clean html with config, without the cache."""
     # Parse and rebuild HTML
     parser = HtmlCleanerParser(config)
     try:
         parser.feed(html)
+        # close() would flush an unfinished tag or comment at the end of a
+        # partial selection as text; drop it and only flush held-back text
+        if parser.rawdata.startswith("<"):
+            parser.rawdata = ""
+        parser.close()
         result = parser.get_output()
         title = parser.get_title()
         pretexts = parser.get_pretexts()
@@ -442,6 +662,9 @@ def clean_html(html, config):
     except Exception as e:
         sublime.error_message("HTML Cleaner: Parse error - {}".format(e))
         return html
+    finally:
+        # Break the parser -> bound handle_data -> parser reference cycle
+        vars(parser).pop("handle_data", None)
 
     # Convert table cells to paragraphs
     if config["convert_tables_to_paragraphs"]:
@@ -450,74 +673,70 @@ def clean_html(html, config):
     # Post-processing with regex
 
     # Remove successive &nbsp;
-    if config["remove_successive_nbsp"]:
-        result = re.sub(r'(&nbsp;\s*){2,}', ' ', result)
-        result = re.sub(r'(\s*&nbsp;\s*)+', ' ', result)
-
-    # Remove empty tags (multiple passes for nested empties)
-    if config["remove_empty_tags"]:
-        for _ in range(3):  # Multiple passes catch nested empty tags
-            result = re.sub(r'<(\w+)[^>]*>\s*</\1>', '', result)
+    if config["remove_successive_nbsp"] and "&nbsp;" in result:
+        result = _RE_NBSP_MULTI.sub(' ', result)
+        result = _RE_NBSP_RUN.sub(' ', result)
 
     # Clean up whitespace
-    if config["preserve_line_breaks"]:
+    preserve_line_breaks = config["preserve_line_breaks"]
+    if preserve_line_breaks:
         # Normalize multiple line breaks
-        result = re.sub(r'\n\s*\n\s*\n+', '\n\n', result)
+        result = _RE_MULTI_NEWLINE.sub('\n\n', result)
         # Add line breaks after block elements for readability
-        result = re.sub(r'(</(?:p|div|h[1-6]|tr|li|ul|ol|table|blockquote)>)', r'\1\n', result)
+        result = _RE_BLOCK_CLOSE.sub(r'\1\n', result)
+        # Clean up extra spaces (but preserve spaces around inline tags)
+        result = _RE_SPACES.sub(' ', result)
     else:
-        # Collapse all whitespace
-        result = re.sub(r'\s+', ' ', result)
+        # Collapse all whitespace; the ends split() drops are stripped below anyway
+        result = " ".join(result.split())
 
-    # Clean up extra spaces (but preserve spaces around inline tags)
-    result = re.sub(r' +', ' ', result)
     # Only remove spaces between block-level tags, not inline tags like <b>, <i>, <em>, <strong>, <a>, etc.
-    block_tags = r'(?:p|div|h[1-6]|tr|li|ul|ol|table|blockquote|br|hr|img)'
-    if config["preserve_line_breaks"]:
+    if preserve_line_breaks:
         # Remove spaces between block tags but keep newlines
-        result = re.sub(r'(</' + block_tags + r'>)[ \t]+(<)', r'\1\2', result)
-        result = re.sub(r'(>)[ \t]+(</?' + block_tags + r')', r'\1\2', result)
+        result = _RE_BLOCK_CLOSE_HSPACE.sub(r'\1\2', result)
+        result = _RE_HSPACE_BLOCK.sub(r'\1\2', result)
     else:
-        result = re.sub(r'(</' + block_tags + r'>)\s+(<)', r'\1\2', result)
-        result = re.sub(r'(>)\s+(</?' + block_tags + r')', r'\1\2', result)
+        result = _RE_BLOCK_CLOSE_SPACE.sub(r'\1\2', result)
+        result = _RE_SPACE_BLOCK.sub(r'\1\2', result)
 
     result = result.strip()
 
     # Convert div markers to paragraphs (do this before line cleanup)
-    result = re.sub(r'<!--DIV_START-->(.*?)<!--DIV_END-->', lambda m: '<p>{}</p>'.format(m.group(1).strip()) if m.group(1).strip() else '', result, flags=re.DOTALL)
-    # Clean up any remaining div markers
-    result = re.sub(r'<!--DIV_START-->', '', result)
-    result = re.sub(r'<!--DIV_END-->', '', result)
+    if _DIV_START in result or _DIV_END in result:
+        def replace_div(match):
+            content = match.group(1).strip()
+            return f'<p>{content}</p>' if content else ''
+
+        result = _RE_DIV.sub(replace_div, result)
+        # Clean up any remaining div markers
+        result = _RE_DIV_MARKER.sub('', result)
 
     # Final cleanup pass: trim each line and normalize paragraph spacing
     lines = result.split('\n')
     lines = [line.strip() for line in lines]  # Trim leading/trailing whitespace from each line
     result = '\n'.join(lines)
     # Normalize multiple blank lines to single blank line
-    result = re.sub(r'\n{3,}', '\n\n', result)
-    # Remove whitespace/newlines immediately after opening <p> and before closing </p>
-    result = re.sub(r'<p>\s+', '<p>', result)
-    result = re.sub(r'\s+</p>', '</p>', result)
-    # Remove <br> at the start of paragraphs
-    result = re.sub(r'<p><br\s*/?>', '<p>', result)
-    # Remove nested/redundant <p> tags
-    for _ in range(3):  # Multiple passes for deeply nested
-        result = re.sub(r'<p>\s*<p>', '<p>', result)
-        result = re.sub(r'</p>\s*</p>', '</p>', result)
-    # Remove any remaining empty <p> tags (including ones with only whitespace, &nbsp;, or thin spaces)
-    result = re.sub(r'<p>\s*</p>\n*', '', result)
-    result = re.sub(r'<p>(\s|&nbsp;|&#8202;)*</p>\n*', '', result)
-    # Remove dangling <p> and </p> tags on their own lines
-    result = re.sub(r'^<p>\s*\n', '', result)
-    result = re.sub(r'\n\s*</p>\s*\n', '\n', result)
-    result = re.sub(r'^\s*</p>\s*\n', '', result)
-    # Add blank line between consecutive paragraphs
-    result = re.sub(r'(</p>)\n(<p>)', r'\1\n\n\2', result)
-    # Center paragraphs that contain only an image (with or without bold/link wrappers)
-    result = re.sub(r'<p>\s*<b>\s*(\[link\]<img [^>]+/>\[/link\])\s*</b>\s*</p>', r'<p align="center">\1</p>', result)
-    result = re.sub(r'<p>\s*<b>\s*(<img [^>]+/>)\s*</b>\s*</p>', r'<p align="center">\1</p>', result)
-    result = re.sub(r'<p>(\s*\[link\]<img [^>]+/>\[/link\]\s*)</p>', r'<p align="center">\1</p>', result)
-    result = re.sub(r'<p>(\s*<img [^>]+/>\s*)</p>', r'<p align="center">\1</p>', result)
+    result = _RE_BLANK_LINES.sub('\n\n', result)
+    # Paragraph cleanup (every pass below needs a <p> or </p> to match)
+    if "<p>" in result or "</p>" in result:
+        # Remove whitespace/newlines immediately after opening <p> and before closing </p>
+        result = _RE_P_OPEN_SPACE.sub('<p>', result)
+        result = _RE_P_CLOSE_SPACE.sub('</p>', result)
+        # Remove <br> at the start of paragraphs
+        result = _RE_P_LEADING_BR.sub('<p>', result)
+        # Remove nested/redundant <p> tags (a whole run collapses in one pass)
+        result = _RE_P_NESTED.sub(r'\1', result)
+        # Remove any remaining empty <p> tags (including ones with only whitespace, &nbsp;, or thin spaces)
+        result = _RE_P_EMPTY.sub('', result)
+        result = _RE_P_BLANK.sub('', result)
+        # Remove dangling <p> and </p> tags on their own lines
+        result = _RE_P_DANGLING_OPEN.sub('', result)
+        result = _RE_P_DANGLING_CLOSE.sub('\n', result)
+        result = _RE_P_LEADING_CLOSE.sub('', result)
+        # Add blank line between consecutive paragraphs
+        result = _RE_P_ADJACENT.sub(r'\1\n\n\2', result)
+        # Center paragraphs that contain only an image (with or without bold/link wrappers)
+        result = _RE_IMG_ONLY_P.sub(r'<p align="center">\1\2</p>', result)
     result = result.strip()
 
     # Build header with links, title, pretexts
@@ -571,17 +790,20 @@ class HtmlCleanerCommand(sublime_plugin.TextCommand):
             region = sublime.Region(0, self.view.size())
             original = self.view.substr(region)
             clean_result = clean_html(original, CONFIG)
-            self.view.replace(edit, region, clean_result["result"])
+            # Leave already-clean text alone (no edit, no re-highlight)
+            if clean_result["result"] != original:
+                self.view.replace(edit, region, clean_result["result"])
             self._copy_to_clipboard_history(clean_result)
             sublime.status_message("HTML Cleaner: Cleaned entire file")
         else:
             # Clean each selection (use last selection for clipboard)
             last_result = None
-            for i, sel in enumerate(reversed(selections)):
+            for sel in reversed(selections):
                 if not sel.empty():
                     original = self.view.substr(sel)
                     clean_result = clean_html(original, CONFIG)
-                    self.view.replace(edit, sel, clean_result["result"])
+                    if clean_result["result"] != original:
+                        self.view.replace(edit, sel, clean_result["result"])
                     last_result = clean_result
             if last_result:
                 self._copy_to_clipboard_history(last_result)